@@ -1,9 +1,19 @@
 from __future__ import annotations
 import os
 import json
+import hashlib
+import pickle
 from pathlib import Path
 import asyncio
-from typing import List, Dict, Any, Optional
+from dataclasses import dataclass, field
+import ahocorasick
+import aiorwlock
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+try:
+    import orjson
+except ImportError:  # 没装 orjson 时退回标准库
+    orjson = None
 
 from astrbot.api.event import filter, AstrMessageEvent
 from astrbot.api.star import Context, Star, register, StarTools
@@ -13,38 +23,219 @@ import re
 
 
 _AT_CQ = re.compile(r"\[CQ:at,[^\]]+\]")
+_PLAIN = Comp.Plain
+# 触发全体 @ 的口令，与昵称共用同一台自动机
+_TRIGGERS = ("都来康", "都来看")
+# 日志行数超过存活记录数的这么多倍时整体压缩重写
+_COMPACT_RATIO = 4
+_COMPACT_MIN = 64
+# 自动机缓存格式号；改动 _nick_key 规则或 (len, sids) 负载结构时必须加一
+_AC_CACHE_FORMAT = 1
 
 
 def _strip_at(event) -> str:
     # 首选：基于组件拿纯文字
-    parts = []
-    for seg in event.get_messages():  # ← 核心修复
-        if isinstance(seg, Comp.Plain):
-            parts.append(seg.text)
-    if parts:
-        return "".join(parts).strip()
+    text = "".join(seg.text for seg in event.get_messages() if type(seg) is _PLAIN)
+    if text:
+        return text.strip()
 
     # 兜底：部分平台只给字符串
     raw = event.message_str or ""  # 文档明确提供 message_str 属性/同名方法
     return _AT_CQ.sub("", raw).strip()
 
 
+def _json_loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data.decode("utf-8"))
+
+
+@dataclass(slots=True, eq=False)
+class MemberRec:
+    # eq=False：按身份比较，list.remove 不会误删字段相同的另一条记录
+    sid: str
+    group_id: str
+    nickname: List[str] = field(default_factory=list)
+
+
+def _rec_to_dict(rec: MemberRec) -> Dict[str, Any]:
+    return {"sid": rec.sid, "group_id": rec.group_id, "nickname": rec.nickname}
+
+
+def _read_bytes(path: str) -> bytes:
+    # 一次 os.read 直接拿 bytes，省掉 Path.read_text 的解码与中间拷贝
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        buf = os.read(fd, size)
+        while len(buf) < size:  # 超大文件可能分多次才读完
+            chunk = os.read(fd, size - len(buf))
+            if not chunk:
+                break
+            buf += chunk
+    finally:
+        os.close(fd)
+    return buf
+
+
+def _json_line(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_rec_to_dict) + b"\n"
+    return (
+        json.dumps(obj, ensure_ascii=False, default=_rec_to_dict).encode("utf-8")
+        + b"\n"
+    )
+
+
 def _norm_str(s: str) -> str:
     return s.strip()
 
 
+def _nick_key(s: str) -> str:
+    # 匹配用的规范形式；存储仍保留原始写法
+    return s.strip().casefold()
+
+
+class _MemberStore:
+    # 成员记录与索引；指令修改与日志回放共用这一套规则
+    def __init__(self):
+        self.members: List[MemberRec] = []
+        # 索引：(gid, sid) -> 记录；(gid, nick) -> {sid}
+        self.by_sid: Dict[Tuple[str, str], MemberRec] = {}
+        self.by_nick: Dict[Tuple[str, str], Set[str]] = {}
+        # 按群分区的记录列表（保持文件顺序）；没有成员的群不在其中
+        self.by_group: Dict[str, List[MemberRec]] = {}
+        # 昵称有变动的群，对应的自动机需要重建
+        self.touched: Set[str] = set()
+
+    def _index_nick(self, gid: str, sid: str, nick: str):
+        key = _nick_key(nick)
+        if key:
+            self.by_nick.setdefault((gid, key), set()).add(sid)
+            self.touched.add(gid)
+
+    def _unindex_nick(self, gid: str, sid: str, nick: str):
+        key = (gid, _nick_key(nick))
+        sids = self.by_nick.get(key)
+        if sids is None:
+            return
+        sids.discard(sid)
+        if not sids:
+            del self.by_nick[key]
+        self.touched.add(gid)
+
+    # 以下修改方法返回是否真的有改动
+    def ensure(self, gid: str, sid: str) -> MemberRec:
+        rec = self.by_sid.get((gid, sid))
+        if rec is None:
+            rec = MemberRec(sid=sid, group_id=gid)
+            self.members.append(rec)
+            self.by_sid[(gid, sid)] = rec
+            self.by_group.setdefault(gid, []).append(rec)
+        return rec
+
+    def add(self, gid: str, sid: str, nickname: str) -> bool:
+        key = _nick_key(nickname)
+        if not key:
+            return False
+        nicks = self.ensure(gid, sid).nickname
+        if any(_nick_key(x) == key for x in nicks):
+            return False
+        nicks.append(nickname)
+        self._index_nick(gid, sid, nickname)
+        return True
+
+    def rm_nick(self, gid: str, sid: str, key: str) -> bool:
+        rec = self.by_sid.get((gid, sid))
+        if rec is None:
+            return False
+        nicks = rec.nickname
+        new_nicks = [x for x in nicks if _nick_key(x) != key]
+        if len(new_nicks) == len(nicks):
+            return False
+        rec.nickname = new_nicks
+        self._unindex_nick(gid, sid, key)
+        return True
+
+    def rm_member(self, gid: str, sid: str) -> bool:
+        rec = self.by_sid.pop((gid, sid), None)
+        if rec is None:
+            return False
+        for x in rec.nickname:
+            self._unindex_nick(gid, sid, x)
+        group = self.by_group[gid]
+        group.remove(rec)
+        if not group:
+            del self.by_group[gid]
+        self.members.remove(rec)
+        return True
+
+    def apply(self, item: Dict[str, Any]):
+        # 回放一行日志
+        gid = item.get("group_id") or ""
+        sid = item.get("sid")
+        if not sid:
+            return
+        op = item.get("op")
+        if op is None:  # 完整记录（压缩后的快照行 / 旧版 JSON）
+            self.ensure(gid, sid)
+            for x in item.get("nickname", []):
+                self.add(gid, sid, x)
+        elif op == "add":
+            self.add(gid, sid, item.get("nickname", ""))
+        elif op == "rm_nick":
+            self.rm_nick(gid, sid, _nick_key(item.get("nickname", "")))
+        elif op == "rm_member":
+            self.rm_member(gid, sid)
+
+    def find_by_nickname(
+        self, nick: str, group_id: Optional[str] = None
+    ) -> List[MemberRec]:
+        if group_id is None:
+            gids = list(self.by_group)
+        else:
+            gids = (group_id,)
+        out = []
+        for gid in gids:
+            for sid in self.by_nick.get((gid, _nick_key(nick)), ()):
+                rec = self.by_sid.get((gid, sid))
+                if rec is not None:
+                    out.append(rec)
+        return out
+
+
 @register(
     "astrbot_plugin_nickname",
     "GrahLnn",
     "按昵称映射@成员并复读消息；支持增/删昵称与整成员记录",
-    "1.0.1",
+    "1.1.0",
 )
 class NicknamePlugin(Star):
     def __init__(self, context: Context):
         super().__init__(context)
         self._initialize_basic_paths()
-        self._lock = asyncio.Lock()
-        self._members: List[Dict[str, Any]] = []
+        # 指令修改、生成写盘快照与重新加载都走写锁；
+        # 群消息热路径只读内存索引、不加锁
+        self._lock = aiorwlock.RWLock()
+        # 重新加载时整体替换，处理器不会看到半成品
+        self._store = _MemberStore()
+        # 每个群一台 Aho-Corasick 自动机；store.touched 里的群用时重建
+        self._ac: Dict[str, ahocorasick.Automaton] = {}
+        # 每个群所有昵称/口令的首字符，消息里一个都没有就不必跑自动机
+        self._first_chars: Dict[str, frozenset] = {}
+        # 追加式日志：修改先攒在 _pending，延迟后一次性追加到文件
+        self._pending: List[bytes] = []
+        self._log_lines = 0
+        self._compact_needed = False
+        # 迁移旧 members.json 后，首次整体重写成功再把它改名作废
+        self._retire_legacy = False
+        # 磁盘上数据文件内容的 blake2b（随写入增量更新）；None 表示不确定
+        self._file_hash: Optional[Any] = None
+        self._dirty = False
+        self._flush_task: Optional[asyncio.Task] = None
+        # 单一写盘协程：(是否整体重写, 数据, 行数)，排队的任务在写之前合并
+        self._write_q: asyncio.Queue[Tuple[bool, bytes, int]] = asyncio.Queue()
+        self._writer = asyncio.create_task(self._writer_loop())
         self.init_task = asyncio.create_task(self._load())
 
     def _initialize_basic_paths(self):
@@ -55,54 +246,276 @@ class NicknamePlugin(Star):
         os.makedirs(self.persistent_data_root_path, exist_ok=True)
         logger.info(f"昵称插件的持久化数据目录: {self.persistent_data_root_path}")
 
-        self.members_path = os.path.join(self.persistent_data_root_path, "members.json")
+        self.members_path = os.path.join(
+            self.persistent_data_root_path, "members.ndjson"
+        )
+        # 旧版本的整文件 JSON，首次加载时迁移
+        self.legacy_members_path = os.path.join(
+            self.persistent_data_root_path, "members.json"
+        )
+        # 自动机磁盘缓存；manifest 记录对应的数据文件摘要，不一致就作废
+        self.ac_cache_dir = os.path.join(self.persistent_data_root_path, "ac_cache")
+        self.ac_manifest_path = os.path.join(self.ac_cache_dir, "manifest.json")
 
     async def _load(self):
-        async with self._lock:
-            if not os.path.exists(self.members_path):
-                self._members = []
-                return
-            try:
-                data = await asyncio.to_thread(
-                    lambda: json.loads(
-                        Path(self.members_path).read_text(encoding="utf-8")
-                    )
-                )
-                self._members = data
-            except Exception as e:
-                logger.error(f"加载 members.json 失败: {e}")
-                self._members = []
-
-    async def _save(self):
-        async with self._lock:
-
-            def write():
-                tmp = Path(self.members_path).with_suffix(".tmp")
-                tmp.write_text(
-                    json.dumps(self._members, ensure_ascii=False, indent=2),
-                    encoding="utf-8",
-                )
-                tmp.replace(self.members_path)
-
-            await asyncio.to_thread(write)
-
-    def _find_by_sid_group(self, sid: str, group_id: str) -> Optional[Dict[str, Any]]:
-        for m in self._members:
-            if m.get("sid") == sid and m.get("group_id") == group_id:
-                return m
-        return None
-
-    def _find_all_by_nickname(
-        self, nick: str, group_id: Optional[str] = None
-    ) -> List[Dict[str, Any]]:
+        async with self._lock.writer:
+            # 等排队中的写盘任务落地，读到的才是最新文件
+            await self._write_q.join()
+            legacy = not os.path.exists(self.members_path) and os.path.exists(
+                self.legacy_members_path
+            )
+            store = _MemberStore()
+            cached: Dict[str, Tuple[ahocorasick.Automaton, frozenset]] = {}
+            file_hash = None if legacy else hashlib.blake2b()
+            n_lines = 0
+            damaged = False
+            if legacy or os.path.exists(self.members_path):
+                try:
+                    if legacy:
+                        items = await asyncio.to_thread(
+                            lambda: _json_loads(
+                                _read_bytes(self.legacy_members_path)
+                            )
+                        )
+                    else:
+                        items, damaged, file_hash = await asyncio.to_thread(
+                            self._read_log
+                        )
+                        if not damaged and not self._pending:
+                            try:
+                                cached = await asyncio.to_thread(
+                                    self._read_ac_cache, file_hash.hexdigest()
+                                )
+                            except Exception as e:
+                                logger.warning(f"读取自动机缓存失败，将重新构建: {e}")
+                    n_lines = len(items)
+                    # 尚未写盘的修改也回放进来，它们之后照常追加到文件
+                    items += [_json_loads(line) for line in self._pending]
+                    for item in items:
+                        store.apply(item)
+                except Exception as e:
+                    logger.error(f"加载成员数据失败: {e}")
+                    return
+            # 新状态全在局部建好后一次性换入，处理器不会看到半空的存储
+            self._swap_in(store, cached)
+            self._log_lines = n_lines
+            self._file_hash = file_hash
+            if legacy:
+                logger.info(f"迁移 members.json 到 {self.members_path}")
+                self._retire_legacy = True
+            if legacy or damaged:
+                # 重写一份干净的文件，避免后续追加接在残行后面
+                self._compact_needed = True
+                self._schedule_flush(0)
+
+    def _read_log(self) -> Tuple[List[Dict[str, Any]], bool, Any]:
         out = []
-        for m in self._members:
-            if group_id is not None and m.get("group_id") != group_id:
+        damaged = False
+        data = _read_bytes(self.members_path)
+        for line in data.split(b"\n"):
+            line = line.strip()
+            if not line:
                 continue
-            if any(nick == _norm_str(x) for x in m.get("nickname", [])):
-                out.append(m)
+            try:
+                out.append(_json_loads(line))
+            except ValueError:
+                # 追加写到一半崩溃时末行可能不完整，跳过即可
+                logger.warning(f"跳过损坏的成员数据行: {line[:80]!r}")
+                damaged = True
+        return out, damaged, hashlib.blake2b(data)
+
+    def _ac_cache_file(self, gid: str) -> str:
+        # gid 不一定是合法文件名，取摘要
+        name = hashlib.blake2b(gid.encode("utf-8"), digest_size=8).hexdigest()
+        return os.path.join(self.ac_cache_dir, f"ac_{name}.bin")
+
+    def _read_ac_cache(
+        self, digest: str
+    ) -> Dict[str, Tuple[ahocorasick.Automaton, frozenset]]:
+        if not os.path.exists(self.ac_manifest_path):
+            return {}
+        manifest = _json_loads(_read_bytes(self.ac_manifest_path))
+        if (
+            manifest.get("format") != _AC_CACHE_FORMAT
+            or manifest.get("triggers") != list(_TRIGGERS)
+            or manifest.get("source") != digest
+        ):
+            return {}
+        out = {}
+        for gid, first in manifest.get("groups", {}).items():
+            ac = ahocorasick.load(self._ac_cache_file(gid), pickle.loads)
+            out[gid] = (ac, frozenset(first))
         return out
 
+    def _write_ac_cache(
+        self,
+        acs: Dict[str, Tuple[ahocorasick.Automaton, str]],
+        digest: Optional[str],
+    ):
+        os.makedirs(self.ac_cache_dir, exist_ok=True)
+        # 先作废旧 manifest，中途失败也不会指向写了一半的文件
+        if os.path.exists(self.ac_manifest_path):
+            os.remove(self.ac_manifest_path)
+        # 最后一次落盘没成功时，磁盘数据与内存不一致，不能写缓存
+        if digest is None:
+            return
+        keep = set()
+        for gid, (ac, _) in acs.items():
+            path = self._ac_cache_file(gid)
+            ac.save(path, pickle.dumps)
+            keep.add(os.path.basename(path))
+        for name in os.listdir(self.ac_cache_dir):
+            if name.endswith(".bin") and name not in keep:
+                os.remove(os.path.join(self.ac_cache_dir, name))
+        manifest = {
+            "format": _AC_CACHE_FORMAT,
+            "triggers": list(_TRIGGERS),
+            "source": digest,
+            "groups": {gid: first for gid, (_, first) in acs.items()},
+        }
+        tmp = self.ac_manifest_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_json_line(manifest))
+        os.replace(tmp, self.ac_manifest_path)
+
+    async def _save(self, compact: bool = False):
+        # 会改写盘簿记（_pending/_log_lines 等），必须走写锁
+        async with self._lock.writer:
+            members = self._store.members
+            if compact and self._log_lines + len(self._pending) > len(members):
+                self._compact_needed = True
+            if not (self._dirty or self._compact_needed):
+                return
+            self._dirty = False
+            if self._compact_needed or self._log_lines + len(
+                self._pending
+            ) > _COMPACT_RATIO * max(len(members), _COMPACT_MIN):
+                job = (True, b"".join(_json_line(rec) for rec in members), len(members))
+                self._compact_needed = False
+            else:
+                job = (False, b"".join(self._pending), len(self._pending))
+            self._pending = []
+        self._write_q.put_nowait(job)
+
+    def _write_file(self, data: bytes):
+        tmp = Path(self.members_path).with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.members_path)
+
+    def _retire_legacy_file(self):
+        if not os.path.exists(self.legacy_members_path):
+            return
+        retired = self.legacy_members_path + ".migrated"
+        os.replace(self.legacy_members_path, retired)
+        logger.info(
+            f"members.json 已迁移为 {self.members_path}，旧文件不再使用，已改名为 {retired}"
+        )
+
+    def _append_file(self, data: bytes):
+        with open(self.members_path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def _writer_loop(self):
+        while True:
+            rewrite, data, lines = await self._write_q.get()
+            n = 1
+            # 合并已排队的任务：遇到整体重写就丢弃之前的追加
+            while not self._write_q.empty():
+                r, d, c = self._write_q.get_nowait()
+                n += 1
+                if r:
+                    rewrite, data, lines = True, d, c
+                else:
+                    data += d
+                    lines += c
+            try:
+                if rewrite:
+                    await asyncio.to_thread(self._write_file, data)
+                    self._log_lines = lines
+                    self._file_hash = hashlib.blake2b(data)
+                    if self._retire_legacy:
+                        self._retire_legacy = False
+                        await asyncio.to_thread(self._retire_legacy_file)
+                elif data:
+                    await asyncio.to_thread(self._append_file, data)
+                    self._log_lines += lines
+                    if self._file_hash is not None:
+                        self._file_hash.update(data)
+            except Exception as e:
+                # 这批修改已离开 _pending，且追加失败可能留下残行；
+                # 下次落盘改为整份快照重写，内存状态仍是准的
+                logger.error(f"保存成员数据失败，稍后整体重写: {e}")
+                self._file_hash = None
+                self._compact_needed = True
+                self._schedule_flush()
+            finally:
+                for _ in range(n):
+                    self._write_q.task_done()
+
+    def _schedule_flush(self, delay: float = 0.2):
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_after(delay))
+
+    async def _flush_after(self, delay: float):
+        await asyncio.sleep(delay)
+        try:
+            await self._save()
+        except Exception as e:
+            logger.error(f"保存成员数据失败: {e}")
+
+    async def _flush_now(self, compact: bool = False):
+        if self._flush_task is not None:
+            await self._flush_task
+        await self._save(compact=compact)
+        await self._write_q.join()
+
+    def _log(self, op: Dict[str, Any]):
+        self._pending.append(_json_line(op))
+        self._schedule_flush()
+
+    def _swap_in(
+        self,
+        store: _MemberStore,
+        cached: Dict[str, Tuple[ahocorasick.Automaton, frozenset]],
+    ):
+        store.touched.clear()
+        self._store = store
+        self._ac = {gid: ac for gid, (ac, _) in cached.items()}
+        self._first_chars = {gid: first for gid, (_, first) in cached.items()}
+
+    def _automaton(self, gid: str) -> ahocorasick.Automaton:
+        ac = self._ac.get(gid)
+        if ac is not None and gid not in self._store.touched:
+            return ac
+        ac = ahocorasick.Automaton()
+        first = {t[0] for t in _TRIGGERS}
+        # 只遍历本群的记录，重建代价与其他群无关
+        seen: Set[str] = set()
+        for rec in self._store.by_group.get(gid, ()):
+            for x in rec.nickname:
+                key = _nick_key(x)
+                if not key or key in seen:
+                    continue
+                seen.add(key)
+                sids = self._store.by_nick.get((gid, key))
+                if sids:
+                    ac.add_word(key, (len(key), tuple(sids)))
+                    first.add(key[0])
+        # 口令最后加入，与昵称重名时口令优先；sids 为 None 表示口令
+        for t in _TRIGGERS:
+            ac.add_word(t, (len(t), None))
+        ac.make_automaton()
+        self._ac[gid] = ac
+        self._first_chars[gid] = frozenset(first)
+        self._store.touched.discard(gid)
+        return ac
+
     def _first_at_sid(self, event: AstrMessageEvent) -> Optional[str]:
         # AstrBot 的消息链组件 At(qq=xxx)
         for seg in event.message_obj.message:
@@ -115,7 +528,8 @@ class NicknamePlugin(Star):
     @filter.permission_type(filter.PermissionType.ADMIN)
     @filter.command("member")
     async def cmd_member(self, event: AstrMessageEvent, nickname: str):
-        await self._load()
+        if not self.init_task.done():
+            await self.init_task
 
         gid = event.get_group_id() or ""
         if not gid:
@@ -132,16 +546,11 @@ class NicknamePlugin(Star):
             yield event.plain_result("无效昵称。")
             return
 
-        rec = self._find_by_sid_group(sid, gid)
-        if rec is None:
-            rec = {"nickname": [nickname], "sid": sid, "group_id": gid}
-            self._members.append(rec)
-        else:
-            nicks = rec.setdefault("nickname", [])
-            if all(_norm_str(x) != nickname for x in nicks):
-                nicks.append(nickname)
-
-        await self._save()
+        async with self._lock.writer:
+            if self._store.add(gid, sid, nickname):
+                self._log(
+                    {"op": "add", "group_id": gid, "sid": sid, "nickname": nickname}
+                )
         yield event.plain_result(f"已记录：{nickname} -> {sid}")
         return
 
@@ -149,7 +558,8 @@ class NicknamePlugin(Star):
     @filter.permission_type(filter.PermissionType.ADMIN)
     @filter.command("rm_nick")
     async def cmd_rm_nick(self, event: AstrMessageEvent, nickname: str):
-        await self._load()
+        if not self.init_task.done():
+            await self.init_task
 
         gid = event.get_group_id() or ""
         if not gid:
@@ -157,16 +567,23 @@ class NicknamePlugin(Star):
             return
 
         nickname = _norm_str(nickname)
+        key = _nick_key(nickname)
         touched = 0
-        for rec in self._find_all_by_nickname(nickname, group_id=gid):
-            nicks = rec.get("nickname", [])
-            new_nicks = [x for x in nicks if _norm_str(x) != nickname]
-            if len(new_nicks) != len(nicks):
-                rec["nickname"] = new_nicks
-                touched += 1
+        async with self._lock.writer:
+            for rec in self._store.find_by_nickname(nickname, group_id=gid):
+                sid = rec.sid
+                if self._store.rm_nick(gid, sid, key):
+                    self._log(
+                        {
+                            "op": "rm_nick",
+                            "group_id": gid,
+                            "sid": sid,
+                            "nickname": nickname,
+                        }
+                    )
+                    touched += 1
 
         if touched:
-            await self._save()
             yield event.plain_result(f"已移除昵称：{nickname}（影响记录 {touched}）")
         else:
             yield event.plain_result("未找到。")
@@ -176,7 +593,8 @@ class NicknamePlugin(Star):
     @filter.permission_type(filter.PermissionType.ADMIN)
     @filter.command("rm_member")
     async def cmd_rm_member(self, event: AstrMessageEvent, nickname: str):
-        await self._load()
+        if not self.init_task.done():
+            await self.init_task
 
         gid = event.get_group_id() or ""
         if not gid:
@@ -184,23 +602,31 @@ class NicknamePlugin(Star):
             return
 
         nickname = _norm_str(nickname)
-        before = len(self._members)
-        self._members = [
-            rec
-            for rec in self._members
-            if not (
-                rec.get("group_id") == gid
-                and any(_norm_str(x) == nickname for x in rec.get("nickname", []))
-            )
-        ]
-        removed = before - len(self._members)
+        removed = 0
+        async with self._lock.writer:
+            for rec in self._store.find_by_nickname(nickname, group_id=gid):
+                sid = rec.sid
+                if self._store.rm_member(gid, sid):
+                    self._log({"op": "rm_member", "group_id": gid, "sid": sid})
+                    removed += 1
         if removed:
-            await self._save()
             yield event.plain_result(f"已删除成员记录：{removed}")
         else:
             yield event.plain_result("未找到。")
         return
 
+    # 指令5：/reload_nick 从磁盘重新加载（仅在手动改过数据文件时需要）
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @filter.command("reload_nick")
+    async def cmd_reload_nick(self, event: AstrMessageEvent):
+        if not self.init_task.done():
+            await self.init_task
+        # 先把未落盘的修改写出去，免得被重新加载覆盖
+        await self._flush_now()
+        await self._load()
+        yield event.plain_result(f"已重新加载成员记录：{len(self._store.members)}")
+        return
+
     @filter.permission_type(filter.PermissionType.ADMIN)
     @filter.command("nick_path")
     async def cmd_nick_path(self, event: AstrMessageEvent):
@@ -211,54 +637,51 @@ class NicknamePlugin(Star):
     # 仅群聊触发，避免私聊误报；优先级低于命令，确保不抢
     @filter.event_message_type(filter.EventMessageType.GROUP_MESSAGE)
     async def on_group_message(self, event: AstrMessageEvent):
+        # 先做最便宜的排除，绝大多数闲聊在这里就返回
+        gid = event.get_group_id() or ""
+        if not gid:
+            return
         raw = _strip_at(event)
-        msg = raw.lower()
-        if msg.startswith("/"):
+        if not raw or raw.startswith("/"):
             return
 
-        await self._load()
-        gid = event.get_group_id() or ""
-        if not gid:
+        if not self.init_task.done():
+            await self.init_task
+        if gid not in self._store.by_group:
+            return
+
+        msg_cf = raw.casefold()
+        ac = self._automaton(gid)
+        if self._first_chars[gid].isdisjoint(msg_cf):
             return
 
-        triggers = ["都来康", "都来看"]
+        # 一次扫描同时找口令与昵称：sid -> 最早出现位置
+        trigger_hit = False
+        first_pos = {}  # sid -> idx
+        for end_idx, (n, sids) in ac.iter(msg_cf):
+            if sids is None:
+                trigger_hit = True
+                break
+            idx = end_idx - n + 1
+            for sid in sids:
+                if sid not in first_pos or idx < first_pos[sid]:
+                    first_pos[sid] = idx
 
         # --- 新增：触发全体命中 ---
-        if any(trigger in msg for trigger in triggers):
-            chain = []
-            for rec in self._members:
-                if rec.get("group_id") != gid:
-                    continue
-                sid = rec.get("sid")
-                if not sid:
-                    continue
-                chain.append(Comp.At(qq=sid))
-                chain.append(Comp.Plain("\u00a0"))
+        if trigger_hit:
+            chain = [
+                seg
+                for rec in self._store.by_group.get(gid, ())
+                for seg in (Comp.At(qq=rec.sid), Comp.Plain("\u00a0"))
+            ]
             logger.debug(chain)
             if chain:
                 # 最后补上消息正文
-                chain[-1] = Comp.Plain("\u200b\n" + msg)
+                chain[-1] = Comp.Plain("\u200b\n" + raw.lower())
                 yield event.chain_result(chain)
             return
         # --- 全体命中结束 ---
 
-        # 收集命中：sid -> 最早出现位置
-        first_pos = {}  # sid -> idx
-        for rec in self._members:
-            if rec.get("group_id") != gid:
-                continue
-            sid = rec.get("sid")
-            if not sid:
-                continue
-            for raw in rec.get("nickname", []):
-                nick = _norm_str(raw)
-                if not nick:
-                    continue
-                idx = msg.find(nick)
-                if idx != -1:
-                    if sid not in first_pos or idx < first_pos[sid]:
-                        first_pos[sid] = idx
-
         if not first_pos:
             return
 
@@ -266,14 +689,28 @@ class NicknamePlugin(Star):
         order_sids = [sid for sid, _ in sorted(first_pos.items(), key=lambda kv: kv[1])]
 
         # 组装消息；注意开头空格用 NBSP（\u00A0）避免被吞
-        chain = []
-        for sid in order_sids:
-            chain.append(Comp.At(qq=sid))
-            chain.append(Comp.Plain("\u00a0"))
-        chain[-1] = Comp.Plain("\u200b\n" + msg)
+        chain = [
+            seg for sid in order_sids for seg in (Comp.At(qq=sid), Comp.Plain("\u00a0"))
+        ]
+        chain[-1] = Comp.Plain("\u200b\n" + raw.lower())
 
         yield event.chain_result(chain)
 
     async def terminate(self):
-        # 无需特殊清理
-        pass
+        # 落盘尚未写出的修改，并顺手压缩日志
+        await self._flush_now(compact=True)
+        self._writer.cancel()
+        # 把已构建且未过期的自动机存盘，下次启动免重建
+        acs = {
+            gid: (ac, "".join(sorted(self._first_chars[gid])))
+            for gid, ac in self._ac.items()
+            if gid not in self._store.touched
+        }
+        flushed = not (self._pending or self._dirty or self._compact_needed)
+        digest = None
+        if flushed and self._file_hash is not None:
+            digest = self._file_hash.hexdigest()
+        try:
+            await asyncio.to_thread(self._write_ac_cache, acs, digest)
+        except Exception as e:
+            logger.warning(f"保存自动机缓存失败: {e}")